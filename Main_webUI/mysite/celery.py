@@ -0,0 +1,18 @@
+"""
+Celery app for mysite.
+
+Paper processing runs on Celery workers so the web process only saves the
+upload and returns. Start a worker with:
+
+    celery -A mysite worker -Q papers --pool=prefork --concurrency=2
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mysite.settings')
+
+app = Celery('mysite')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
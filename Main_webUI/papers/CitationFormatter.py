@@ -1,11 +1,15 @@
 from datetime import datetime
+from functools import lru_cache
+import re
+
+_ALNUM_RE = re.compile(r'[\W_]+')  # everything but letters and digits
 
 class CitationFormatter:
     
     @staticmethod
     def harvard(paper):
         """Harvard style citation"""
-        authors_str = CitationFormatter._format_authors(paper.get('authors', []))
+        authors_str = CitationFormatter._format_authors(tuple(paper.get('authors', [])))
         year = paper.get('year', 'n.d.')
         title = paper.get('title', 'No title')
         link = paper.get('link', '')
@@ -15,7 +19,7 @@ class CitationFormatter:
     @staticmethod
     def apa(paper):
         """APA style citation"""
-        authors_str = CitationFormatter._format_authors_apa(paper.get('authors', []))
+        authors_str = CitationFormatter._format_authors_apa(tuple(paper.get('authors', [])))
         year = paper.get('year', 'n.d.')
         title = paper.get('title', 'No title')
         link = paper.get('link', '')
@@ -24,7 +28,7 @@ class CitationFormatter:
     @staticmethod
     def mla(paper):
         """MLA style citation"""
-        authors_str = CitationFormatter._format_authors_mla(paper.get('authors', []))
+        authors_str = CitationFormatter._format_authors_mla(tuple(paper.get('authors', [])))
         title = paper.get('title', 'No title')
         year = paper.get('year', 'n.d.')
         link = paper.get('link', '')
@@ -34,7 +38,7 @@ class CitationFormatter:
     @staticmethod
     def chicago(paper):
         """Chicago style citation"""
-        authors_str = CitationFormatter._format_authors(paper.get('authors', []))
+        authors_str = CitationFormatter._format_authors(tuple(paper.get('authors', [])))
         title = paper.get('title', 'No title')
         year = paper.get('year', 'n.d.')
         link = paper.get('link', '')
@@ -58,7 +62,7 @@ class CitationFormatter:
         year = paper.get('year', 'n.d.')
         title = paper.get('title', 'No title')
         link = paper.get('link', '')
-        citation_key = ''.join(e for e in title if e.isalnum())[:20] + year  # Simple key
+        citation_key = _ALNUM_RE.sub('', title)[:20] + year  # Simple key
         return f"@misc{{{citation_key},\n  author = {{{authors_str}}},\n  title = {{{title}}},\n  year = {{{year}}},\n  howpublished = {{arXiv}},\n  note = {{Available at: {link}}}\n}}"
 
     # -----------------------
@@ -70,11 +74,10 @@ class CitationFormatter:
         Returns citation text in the given style.
         Defaults to Harvard if style is invalid.
         """
-        if style in ["harvard", "apa", "mla", "chicago", "bibtex"]:
-            return getattr(CitationFormatter, style)(paper)
-        return CitationFormatter.harvard(paper)
+        return _STYLES.get(style, CitationFormatter.harvard)(paper)
     
     @staticmethod
+    @lru_cache(maxsize=1024)  # the same candidate papers recur across paragraphs
     def _format_authors(authors_list):
         n = len(authors_list)
         if n == 0:
@@ -93,6 +96,7 @@ class CitationFormatter:
             return f"{a1[-1]}, {a1[0][0]}. et al."
 
     @staticmethod
+    @lru_cache(maxsize=1024)
     def _format_authors_apa(authors_list):
         """APA: Lastname, F. M., & Lastname, F. M."""
         if not authors_list:
@@ -106,6 +110,7 @@ class CitationFormatter:
         return ', & '.join(formatted)
 
     @staticmethod
+    @lru_cache(maxsize=1024)
     def _format_authors_mla(authors_list):
         """MLA: Lastname, Firstname"""
         if not authors_list:
@@ -115,3 +120,12 @@ class CitationFormatter:
             parts = a.split()
             formatted.append(f"{parts[-1]}, {' '.join(parts[:-1])}")
         return ', '.join(formatted)
+
+
+_STYLES = {
+    "harvard": CitationFormatter.harvard,
+    "apa": CitationFormatter.apa,
+    "mla": CitationFormatter.mla,
+    "chicago": CitationFormatter.chicago,
+    "bibtex": CitationFormatter.bibtex,
+}
@@ -1,7 +1,20 @@
 import re
 import spacy
 
-nlp = spacy.load("en_core_web_sm")
+_TAG_RE = re.compile(r'<.*?>')
+_WS_RE = re.compile(r'\s+')
+
+_NLP = None
+
+def get_nlp():
+    """Shared spaCy pipeline so the model is loaded once per process"""
+    global _NLP
+    if _NLP is None:
+        # Only sentence boundaries are used, so skip the statistical components
+        # and split with the rule-based sentencizer instead of the dependency parser
+        _NLP = spacy.load("en_core_web_sm", exclude=["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer", "ner"])
+        _NLP.add_pipe("sentencizer")
+    return _NLP
 
 class ParagraphCleaner:
     def __init__(self, paragraphs, min_words=10):
@@ -9,12 +22,17 @@ class ParagraphCleaner:
         self.min_words = min_words
 
     def clean(self):
-        return [self._clean(p) for p in self.paragraphs if self._clean(p)]
+        # Parse every paragraph once, batched through nlp.pipe
+        docs = get_nlp().pipe(self._normalize(p) for p in self.paragraphs)
+        cleaned = (self._join_sentences(doc) for doc in docs)
+        return [c for c in cleaned if c]
+
+    @staticmethod
+    def _normalize(text):
+        text = _TAG_RE.sub('', text)
+        return _WS_RE.sub(' ', text).strip()
 
-    def _clean(self, text):
-        text = re.sub(r'<.*?>', '', text)
-        text = re.sub(r'\s+', ' ', text).strip()
-        doc = nlp(text)
+    def _join_sentences(self, doc):
         sentences = [s.text.strip() for s in doc.sents]
         sentences = [s for s in sentences if len(s.split()) >= self.min_words]
         return ' '.join(sentences)
@@ -1,25 +1,113 @@
+import hashlib
+import time
 import requests
-import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
+from urllib3.util.retry import Retry
+from lxml import etree
 import re
 
+# One pooled, keep-alive session per process, so repeated arXiv queries
+# reuse the same connection instead of reconnecting on every search
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504]),
+)
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.mount("https://", _ADAPTER)
+TIMEOUT = (3.05, 60)  # (connect, read) seconds; read covers the gaps while the feed streams
+
+def get_session():
+    """The shared arXiv session, for other apps' arXiv requests"""
+    return _SESSION
+
+_NONALNUM = re.compile(r"[^a-zA-Z0-9\s]")
+
+# Entry fields, compiled once instead of walking the children with find() per field
+ATOM_NS = "http://www.w3.org/2005/Atom"
+NS = {"a": ATOM_NS}
+_ENTRY_TAG = f"{{{ATOM_NS}}}entry"
+_title_xp = etree.XPath("a:title/text()", namespaces=NS, smart_strings=False)
+_id_xp = etree.XPath("a:id/text()", namespaces=NS, smart_strings=False)
+_summary_xp = etree.XPath("a:summary/text()", namespaces=NS, smart_strings=False)
+_authors_xp = etree.XPath("a:author/a:name/text()", namespaces=NS, smart_strings=False)
+_year_xp = etree.XPath("substring(a:published/text(), 1, 4)", namespaces=NS, smart_strings=False)
+
+SEARCH_CACHE_TIMEOUT = 60 * 60 * 24  # arXiv listings update daily
+SEARCH_WORKERS = 4  # concurrent arXiv requests per wave
+WAVE_DELAY = 3  # seconds between waves, per the arXiv API terms of use
+
+def _search_key(query, max_results):
+    # Hashed exactly as sent: case matters to arXiv (AND/OR are operators, and/or are terms).
+    # v2 keys skip entries stored under the earlier lowercased keys.
+    digest = hashlib.blake2b(query.encode(), digest_size=16).hexdigest()
+    return f"arxiv-search:v2:{digest}:{max_results}"
+
 class ArxivSearcher:
     def build_query(self, ranked_keywords, summary, top_n=5):
         kws = [kw for kw, _ in ranked_keywords[:top_n]]
         combined = " ".join(kws) + " " + summary
-        combined = re.sub(r"[^a-zA-Z0-9\s]", "", combined)
+        combined = _NONALNUM.sub("", combined)
         return "+".join(combined.split())
 
     def search(self, query, max_results=20):
+        """Matching papers for a query, served from the shared cache when possible"""
+        key = _search_key(query, max_results)
+        results = cache.get(key)
+        if results is None:
+            results = self._fetch(query, max_results)
+            cache.set(key, results, SEARCH_CACHE_TIMEOUT)
+        return results
+
+    def search_many(self, queries, max_results=20):
+        """
+        Results for several queries, in the same order. Cached queries are
+        read in one round trip; the rest are fetched concurrently over the
+        pooled session, SEARCH_WORKERS at a time with a pause between waves.
+        """
+        keys = {query: _search_key(query, max_results) for query in queries}
+        cached = cache.get_many(keys.values())
+        missing = [query for query in dict.fromkeys(queries) if keys[query] not in cached]
+
+        fetched = {}
+        with ThreadPoolExecutor(max_workers=SEARCH_WORKERS) as executor:
+            for start in range(0, len(missing), SEARCH_WORKERS):
+                if start:
+                    time.sleep(WAVE_DELAY)
+                wave = missing[start:start + SEARCH_WORKERS]
+                fetched.update(zip(wave, executor.map(lambda q: self._fetch(q, max_results), wave)))
+        if fetched:
+            cache.set_many({keys[query]: results for query, results in fetched.items()}, SEARCH_CACHE_TIMEOUT)
+
+        return [fetched[query] if query in fetched else cached[keys[query]] for query in queries]
+
+    def _fetch(self, query, max_results):
         url = f"http://export.arxiv.org/api/query?search_query=all:{query}&start=0&max_results={max_results}"
-        resp = requests.get(url)
-        resp.raise_for_status()
-        root = ET.fromstring(resp.text)
-        results = []
-        for entry in root.findall("{http://www.w3.org/2005/Atom}entry"):
-            title = entry.find("{http://www.w3.org/2005/Atom}title").text
-            link = entry.find("{http://www.w3.org/2005/Atom}id").text
-            summary = entry.find("{http://www.w3.org/2005/Atom}summary").text
-            authors = [a.find("{http://www.w3.org/2005/Atom}name").text.strip() for a in entry.findall("{http://www.w3.org/2005/Atom}author")]
-            year = entry.find("{http://www.w3.org/2005/Atom}published").text[:4]
-            results.append({"title": title.strip(), "link": link.strip(), "summary": summary.strip(), "authors": authors, "year": year})
+        # Closing the streamed response hands its connection back to the pool,
+        # even if parsing fails part-way through
+        with _SESSION.get(url, stream=True, timeout=TIMEOUT) as resp:
+            resp.raise_for_status()
+            resp.raw.decode_content = True  # let urllib3 undo any gzip encoding
+            results = []
+            # Parse entries as the body streams in, freeing each one once it is read.
+            # Reading resp.raw bypasses requests, so a broken stream raises urllib3's
+            # errors; they are re-raised as requests errors for the callers' retries.
+            try:
+                for _, entry in etree.iterparse(resp.raw, events=("end",), tag=_ENTRY_TAG):
+                    title = (_title_xp(entry) or [""])[0]
+                    link = (_id_xp(entry) or [""])[0]
+                    summary = (_summary_xp(entry) or [""])[0]
+                    authors = [name.strip() for name in _authors_xp(entry)]
+                    year = _year_xp(entry)
+                    results.append({"title": title.strip(), "link": link.strip(), "summary": summary.strip(), "authors": authors,
+                                    "authors_str": ", ".join(authors), "year": year})
+                    entry.clear()
+                    while entry.getprevious() is not None:
+                        del entry.getparent()[0]
+            except Urllib3HTTPError as e:
+                raise requests.ConnectionError(f"arXiv response was cut off: {e}") from e
         return results
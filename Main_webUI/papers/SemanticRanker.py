@@ -5,16 +5,45 @@ class SemanticRanker:
     def __init__(self):
         self.model = SentenceTransformer('all-MiniLM-L6-v2')
 
-    def rank(self, paragraph_summary, papers, top_k=3):
-        if not papers:
+    def encode(self, texts):
+        """Unit-length embeddings for a batch of texts, so dot products are cosine similarities"""
+        return self.model.encode(texts, batch_size=64, convert_to_numpy=True,
+                                 normalize_embeddings=True, show_progress_bar=False)
+
+    def embed_papers(self, papers, emb_cache=None):
+        """
+        Embeddings for the papers' summaries. With emb_cache (a dict keyed
+        by paper link), only summaries not embedded before are encoded.
+        """
+        if emb_cache is None:
+            return self.encode([p['summary'] for p in papers])
+        missing = {p['link']: p['summary'] for p in papers if p['link'] not in emb_cache}
+        if missing:
+            for link, emb in zip(missing, self.encode(list(missing.values()))):
+                emb_cache[link] = emb
+        return np.stack([emb_cache[p['link']] for p in papers])
+
+    def rank(self, para_emb, papers, top_k=3, emb_cache=None):
+        """Rank papers against a paragraph embedding from encode()"""
+        if not papers or top_k <= 0:
             return []
-        para_emb = self.model.encode(paragraph_summary)
-        paper_embs = self.model.encode([p['summary'] for p in papers])
-        sims = [(i, np.dot(para_emb, pe)/(np.linalg.norm(para_emb)*np.linalg.norm(pe))) for i, pe in enumerate(paper_embs)]
-        sims.sort(key=lambda x: x[1], reverse=True)
+        paper_embs = self.embed_papers(papers, emb_cache)
+        sims = paper_embs @ para_emb
+        k = min(top_k, len(papers))
+        top = np.argpartition(-sims, k - 1)[:k]  # O(N) selection, then sort only the top k
+        top = top[np.argsort(-sims[top])]
         top_papers = []
-        for idx, sim in sims[:top_k]:
+        for idx in top:
             paper = papers[idx].copy()
-            paper['relevance'] = round(sim*100, 2)
+            paper['relevance'] = round(float(sims[idx])*100, 2)
             top_papers.append(paper)
         return top_papers
+
+_RANKER = None
+
+def get_ranker():
+    """Shared SemanticRanker so the model is loaded once per process"""
+    global _RANKER
+    if _RANKER is None:
+        _RANKER = SemanticRanker()
+    return _RANKER
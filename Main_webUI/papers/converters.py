@@ -0,0 +1,9 @@
+class PaperIdConverter:
+    """Positive paper ids only, so malformed ids never reach a view or the database"""
+    regex = r"[1-9][0-9]{0,9}"
+
+    def to_python(self, value):
+        return int(value)
+
+    def to_url(self, value):
+        return str(value)
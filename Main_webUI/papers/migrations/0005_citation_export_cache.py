@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-15 01:54
+
+from django.db import migrations, models
+
+# Frozen copy of papers.models.build_export_cache as of this migration, so
+# later changes to the live function don't change what the backfill writes
+_BIB_TMPL = "@article{{cite{index},\n  title={{{title}}},\n  author={{{authors}}},\n  year={{{year}}},\n  url={{{link}}}\n}}\n\n"
+
+
+def build_export_cache(index, title, authors, year, citation, link, relevance):
+    relevance = int(relevance or 0)
+    return {
+        "csv_row": [title, authors, year, citation, link, relevance],
+        "json_obj": {
+            "title": title,
+            "authors": authors,
+            "year": year,
+            "citation": citation,
+            "link": link,
+            "relevance": relevance,
+        },
+        "bibtex": _BIB_TMPL.format(index=index, title=title, authors=authors, year=year, link=link),
+    }
+
+
+def backfill_export_cache(apps, schema_editor):
+    Citation = apps.get_model('papers', 'Citation')
+    index_per_paper = {}
+    batch = []
+    citations = Citation.objects.order_by('paper_id', 'paragraph_number', 'id').only(
+        'id', 'paper_id', 'title', 'authors', 'year', 'harvard_citation', 'link', 'relevance'
+    )
+    for c in citations.iterator(chunk_size=500):
+        index = index_per_paper.get(c.paper_id, 0) + 1
+        index_per_paper[c.paper_id] = index
+        c.export_cache = build_export_cache(index, c.title, c.authors, c.year, c.harvard_citation, c.link, c.relevance)
+        batch.append(c)
+        if len(batch) >= 500:
+            Citation.objects.bulk_update(batch, ['export_cache'], batch_size=500)
+            batch = []
+    if batch:
+        Citation.objects.bulk_update(batch, ['export_cache'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('papers', '0004_uploadedpaper_processing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='citation',
+            name='export_cache',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.RunPython(backfill_export_cache, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-15 01:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('papers', '0005_citation_export_cache'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='citation',
+            index=models.Index(fields=['paper', 'paragraph_number'], name='papers_cita_paper_i_af5214_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='uploadedpaper',
+            index=models.Index(fields=['-uploaded_at'], name='papers_uplo_uploade_ca03a3_idx'),
+        ),
+    ]
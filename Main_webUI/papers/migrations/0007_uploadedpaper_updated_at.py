@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-15 01:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('papers', '0006_add_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadedpaper',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
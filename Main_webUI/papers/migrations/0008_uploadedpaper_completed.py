@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-15 01:57
+
+from django.db import migrations, models
+
+
+def mark_completed(apps, schema_editor):
+    UploadedPaper = apps.get_model('papers', 'UploadedPaper')
+    UploadedPaper.objects.filter(processing=False, citations__isnull=False).update(completed=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('papers', '0007_uploadedpaper_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadedpaper',
+            name='completed',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.RunPython(mark_completed, migrations.RunPython.noop),
+    ]
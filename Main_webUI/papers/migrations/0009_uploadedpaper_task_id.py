@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-15 01:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('papers', '0008_uploadedpaper_completed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadedpaper',
+            name='task_id',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-15 02:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('papers', '0009_uploadedpaper_task_id'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='citation',
+            index=models.Index(fields=['paper', 'id'], name='papers_cita_paper_i_5daae0_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-15 02:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('papers', '0010_citation_paper_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadedpaper',
+            name='claimed_attempt',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -1,13 +1,43 @@
 from django.db import models
 from django.contrib.auth.models import User
 
+_BIB_TMPL = "@article{{cite{index},\n  title={{{title}}},\n  author={{{authors}}},\n  year={{{year}}},\n  url={{{link}}}\n}}\n\n"
+
+def build_export_cache(index, title, authors, year, citation, link, relevance):
+    """
+    Pre-formats a citation for every export type so exports
+    can dump the stored values instead of re-formatting per request.
+    """
+    relevance = int(relevance or 0)
+    return {
+        "csv_row": [title, authors, year, citation, link, relevance],
+        "json_obj": {
+            "title": title,
+            "authors": authors,
+            "year": year,
+            "citation": citation,
+            "link": link,
+            "relevance": relevance,
+        },
+        "bibtex": _BIB_TMPL.format(index=index, title=title, authors=authors, year=year, link=link),
+    }
+
 # Create your models here.
 class UploadedPaper(models.Model):
     file = models.FileField(upload_to="uploads/")
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # versions cached viewer data
     processing = models.BooleanField(default=False)
+    completed = models.BooleanField(default=False, db_index=True)  # citations saved successfully
+    task_id = models.CharField(max_length=255, null=True, blank=True)  # Celery task processing this paper
+    claimed_attempt = models.PositiveSmallIntegerField(null=True, blank=True)  # task attempt that started processing
     error_message = models.TextField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["-uploaded_at"]),  # dashboard / default viewer ordering
+        ]
+
 class Citation(models.Model):
     paper = models.ForeignKey(UploadedPaper, on_delete=models.CASCADE, related_name="citations")
     paragraph_number = models.IntegerField(default=0)
@@ -19,6 +49,13 @@ class Citation(models.Model):
     link = models.URLField()
     relevance = models.FloatField(null=True, blank=True)
     matched_text = models.TextField(null=True, blank=True)  # phrase from doc
+    export_cache = models.JSONField(default=dict)  # see build_export_cache
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["paper", "paragraph_number"]),  # viewer ordering per paper
+            models.Index(fields=["paper", "id"]),  # streamed exports in insertion order
+        ]
 
 class UserSettings(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -2,60 +2,44 @@ from .Extractor import TextExtractor
 from .Cleaner import ParagraphCleaner
 from .LLMClient import LLMClient
 from .QueryAPI import ArxivSearcher
-from .SemanticRanker import SemanticRanker
+from .SemanticRanker import get_ranker
 from .CitationFormatter import CitationFormatter
 from django.conf import settings
-import io, csv
-from fpdf import FPDF
+import requests
+from concurrent.futures import ThreadPoolExecutor
 
+PARAGRAPH_WORKERS = 4  # concurrent keyword-ranking LLM calls
 
-def pipeline_run(file_path, doc_type, top_k=3, export_type=None, citation_style="harvard"):
+
+def prepare_paragraphs(file_path, doc_type):
     """
-    Runs the full paper processing pipeline:
-    1. Extracts and cleans paragraphs from uploaded document.
-    2. Uses LLM to extract keywords and summaries per paragraph.
-    3. Queries arXiv API and ranks papers by semantic similarity.
-    4. Formats citations and optionally exports in requested format.
-
-    Args:
-        file_path (str): Path to the uploaded paper.
-        doc_type (str): "pdf" or "docx".
-        top_k (int): Number of top papers to return per paragraph.
-        export_type (str): One of "json", "csv", "bibtex", "pdf". If None, only returns results.
-        citation_style (str or dict): Citation style or dict with key 'citation_style'.
+    Steps 1-2 of the pipeline: extracts and cleans paragraphs from the
+    uploaded document, then uses the LLM to get keywords and a summary for each.
 
     Returns:
-        dict: {
-            "results": list of dict per paragraph,
-            "export": exported content or None
-        }
+        list of dict: {"paragraph", "keywords", "summary"} in document order,
+        empty if the document has no usable paragraphs.
 
     Raises:
+        requests.RequestException: If the LLM API cannot be reached, so the
+            calling task can retry.
         RuntimeError: If LLM fails to generate keywords (likely API limit reached).
     """
-    # Normalize citation_style if passed as dict
-    if isinstance(citation_style, dict):
-        citation_style = citation_style.get("citation_style", "harvard")
-
-    # -----------------------------
-    # Step 1-2: Extract and clean paragraphs
-    # -----------------------------
     extractor = TextExtractor(file_path, doc_type)
     paragraphs = extractor.extract()
     if not paragraphs:
-        return {"results": [], "export": None}
+        return []
 
     cleaner = ParagraphCleaner(paragraphs)
     cleaned_paragraphs = cleaner.clean()
     if not cleaned_paragraphs:
-        return {"results": [], "export": None}
+        return []
 
-    # -----------------------------
-    # Step 3-4: LLM extraction & ranking
-    # -----------------------------
     llm_client = LLMClient()
     try:
         keywords_dict, summaries_dict = llm_client.extract_keywords_and_summary(cleaned_paragraphs)
+    except requests.RequestException:
+        raise  # transient network failure, left for the task's retry
     except Exception as e:
         raise RuntimeError(f"LLM processing failed: {e}")
 
@@ -63,84 +47,87 @@ def pipeline_run(file_path, doc_type, top_k=3, export_type=None, citation_style=
     if not keywords_dict or all(len(kw) == 0 for kw in keywords_dict.values()):
         raise RuntimeError("LLM request could not be completed (likely API limit reached).")
 
-    searcher = ArxivSearcher()
-    ranker = SemanticRanker()
-    formatter = CitationFormatter()
+    return [
+        {"paragraph": para, "keywords": keywords_dict[idx], "summary": summaries_dict[idx]}
+        for idx, para in enumerate(cleaned_paragraphs)
+    ]
+
+
+def paragraph_query(paragraph, keywords, summary):
+    """Step 3 for a single paragraph: ranks its keywords with the LLM and builds the arXiv query"""
+    ranked_keywords = LLMClient().rank_keywords(paragraph, keywords)
+    return ArxivSearcher().build_query(ranked_keywords, summary)
+
+
+def search_paragraphs(items):
+    """
+    Step 3 for a whole document: builds every paragraph's arXiv query, then
+    fetches each distinct query once, since paragraphs with shared keywords
+    often produce the same query.
+
+    Returns:
+        list of list of dict: the candidate papers for each item, in order.
+    """
+    # Rank every paragraph's keywords concurrently; the LLM calls are I/O-bound
+    with ThreadPoolExecutor(max_workers=PARAGRAPH_WORKERS) as executor:
+        queries = list(executor.map(
+            lambda item: paragraph_query(item["paragraph"], item["keywords"], item["summary"]), items
+        ))
+    unique_queries = list(dict.fromkeys(queries))
+    papers_by_query = dict(zip(unique_queries, ArxivSearcher().search_many(unique_queries)))
+    return [papers_by_query[query] for query in queries]
+
 
-    all_results = []
+def rank_paragraph(paragraph, papers, para_emb, top_k=3, citation_style="harvard", emb_cache=None, fmt_cache=None):
+    """
+    Step 4 for a single paragraph: ranks the candidate papers against the
+    paragraph's summary embedding and formats citations for the top_k.
+    rank_paragraphs passes a paper embedding cache and a citation cache
+    shared across paragraphs.
 
-    for idx, para in enumerate(cleaned_paragraphs):
-        paragraph_result = {"paragraph": para, "papers": []}
-        ranked_keywords = llm_client.rank_keywords(para, keywords_dict[idx])
-        query = searcher.build_query(ranked_keywords, summaries_dict[idx])
-        papers = searcher.search(query)
-        top_papers = ranker.rank(summaries_dict[idx], papers, top_k=top_k)
+    Returns:
+        dict: {"paragraph": paragraph, "papers": list of the top_k papers}
+    """
+    top_papers = get_ranker().rank(para_emb, papers, top_k=top_k, emb_cache=emb_cache)
 
-        for paper in top_papers:
+    paragraph_result = {"paragraph": paragraph, "papers": []}
+    for paper in top_papers:
+        key = (paper["link"], citation_style)
+        citation_text = fmt_cache.get(key) if fmt_cache is not None else None
+        if citation_text is None:
             citation_text = CitationFormatter.format(paper, style=citation_style)
-            paragraph_result["papers"].append({
-                "title": paper["title"],
-                "authors": paper["authors"],
-                "year": paper["year"],
-                "link": paper["link"],
-                "relevance": paper["relevance"],
-                "citation": citation_text
-            })
-
-        all_results.append(paragraph_result)
-
-    # -----------------------------
-    # Export handling
-    # -----------------------------
-    export_content = None
-
-    if export_type:
-        export_type = export_type.lower()
-
-        if export_type == "json":
-            export_content = all_results
-
-        elif export_type == "csv":
-            output = io.StringIO()
-            writer = csv.writer(output)
-            writer.writerow(["Paragraph", "Title", "Authors", "Year", "Link", "Relevance", "Citation"])
-            for para_result in all_results:
-                for paper in para_result["papers"]:
-                    writer.writerow([
-                        para_result["paragraph"],
-                        paper["title"],
-                        ", ".join(paper["authors"]),
-                        paper["year"],
-                        paper["link"],
-                        paper["relevance"],
-                        paper["citation"]
-                    ])
-            export_content = output.getvalue()
-
-        elif export_type == "bibtex":
-            bib_entries = [
-                formatter.bibtex(paper)
-                for para_result in all_results
-                for paper in para_result["papers"]
-            ]
-            export_content = "\n\n".join(bib_entries)
-
-        elif export_type == "pdf":
-            pdf = FPDF()
-            pdf.add_page()
-            pdf.set_auto_page_break(auto=True, margin=15)
-            pdf.set_font("Arial", size=12)
-            for para_result in all_results:
-                pdf.multi_cell(0, 5, f"Paragraph: {para_result['paragraph']}\n")
-                for paper in para_result["papers"]:
-                    pdf.multi_cell(0, 5, f"{paper['citation']}\n")
-                pdf.ln(5)
-            pdf_output = io.BytesIO()
-            pdf.output(pdf_output)
-            pdf_output.seek(0)
-            export_content = pdf_output
-
-        else:
-            raise ValueError(f"Unsupported export_type: {export_type}")
-
-    return {"results": all_results, "export": export_content}
+            if fmt_cache is not None:
+                fmt_cache[key] = citation_text
+        paragraph_result["papers"].append({
+            "title": paper["title"],
+            "authors": paper["authors"],
+            # Joined once per search result; entries cached before it existed are joined here
+            "authors_str": paper.get("authors_str") or ", ".join(paper["authors"]),
+            "year": paper["year"],
+            "link": paper["link"],
+            "relevance": paper["relevance"],
+            "citation": citation_text
+        })
+    return paragraph_result
+
+
+def rank_paragraphs(items, top_k=3, citation_style="harvard"):
+    """
+    Step 4 for a group of paragraphs, as run by one Celery subtask.
+    items are {"paragraph", "summary", "papers"} dicts; the summaries are
+    embedded in one batched forward pass, and candidate papers shared
+    between paragraphs are embedded and formatted once.
+
+    Returns:
+        list of dict: rank_paragraph results, in the order of items.
+    """
+    para_embs = get_ranker().encode([item["summary"] or "" for item in items])
+    emb_cache = {}
+    fmt_cache = {}
+    return [
+        rank_paragraph(
+            item["paragraph"], item["papers"], para_emb, top_k=top_k,
+            citation_style=citation_style, emb_cache=emb_cache, fmt_cache=fmt_cache
+        )
+        for item, para_emb in zip(items, para_embs)
+    ]
@@ -1,85 +1,221 @@
-from .models import UploadedPaper, Citation
-from .pipeline import pipeline_run
-from .CitationFormatter import CitationFormatter
+import logging
+import os
+from dataclasses import dataclass
+import requests
+from celery import chord, shared_task
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from .models import UploadedPaper, Citation, build_export_cache
+from . import worker  # noqa: F401 - preloads models in Celery worker processes
 
-def process_paper(paper_id, settings_dict=None, top_k=3):
+logger = logging.getLogger(__name__)
+
+NO_CITATIONS_MESSAGE = "No citations were generated. The document may not contain suitable content for citation extraction."
+TASK_FAILED_MESSAGE = "Processing failed unexpectedly"
+
+
+@dataclass(slots=True)
+class TaskSettings:
+    """The SettingsForm fields process_paper uses; the rest (e.g. export_type) only apply to viewer exports"""
+    citation_style: str = "harvard"
+
+
+PARAGRAPHS_PER_TASK = 8  # paragraphs ranked per chord subtask, embedded in one batch
+STATUS_TIMEOUT = 60 * 10  # seconds a finished status stays available to the loading page
+
+def status_key(paper_id):
+    return f"paper-status:{paper_id}"
+
+def publish_status(paper_id, status, **data):
+    """Store the final processing status for the loading page's status polls"""
+    cache.set(status_key(paper_id), {"status": status, **data}, STATUS_TIMEOUT)
+
+def get_status(paper_id):
+    """Return the published status dict, or None while the paper is still processing"""
+    return cache.get(status_key(paper_id))
+
+def fail_paper(paper, error):
+    """Delete a paper that failed processing, then remove its file and publish the error for the loading page"""
+    paper_id = paper.id
+    file_path = paper.file.path if paper.file else None
+    with transaction.atomic():
+        paper.delete()
+        # Only once the delete commits, so a rolled-back delete keeps its file and publishes nothing
+        transaction.on_commit(lambda: remove_upload(file_path))
+        transaction.on_commit(lambda: publish_status(paper_id, "error", error=error))
+
+def remove_upload(file_path):
+    """Delete a removed paper's uploaded file"""
+    try:
+        if file_path and os.path.exists(file_path):
+            os.remove(file_path)
+    except Exception as file_delete_error:
+        print(f"Error deleting file: {file_delete_error}")
+
+@shared_task(bind=True, autoretry_for=(requests.RequestException,), retry_backoff=True, max_retries=3)
+def process_paper(self, paper_id, settings_dict=None, top_k=3):
     """
-    Improved error handling for paper processing
+    Celery task that extracts an uploaded paper's paragraphs and searches
+    arXiv for all of them at once, then fans the ranking out as a chord of
+    rank_paragraphs tasks whose results are stored by save_citations.
+    Network errors are retried with backoff. When the document can't be
+    processed, or retries run out, the error is published for the loading
+    page and the paper is removed.
     """
-    try:
-        paper = UploadedPaper.objects.get(id=paper_id)
-    except UploadedPaper.DoesNotExist:
-        raise RuntimeError("Paper not found")
-        
-    paper.processing = True
-    paper.error_message = None
-    paper.save()
+    # Imported here so web processes never load the NLP models
+    from .pipeline import prepare_paragraphs, search_paragraphs
+
+    # Claim the paper under the row lock, so a duplicate delivery of this task
+    # returns here instead of running the pipeline a second time. Retries
+    # (a higher attempt number) may take over the claim.
+    attempt = self.request.retries
+    with transaction.atomic():
+        paper = UploadedPaper.objects.select_for_update().only(
+            "id", "file", "completed", "claimed_attempt"
+        ).filter(id=paper_id).first()
+        if paper is None or paper.completed:
+            return  # Paper was deleted, or already processed by an earlier run of this task
+        if paper.claimed_attempt is not None and paper.claimed_attempt >= attempt:
+            return  # This attempt is already running in another worker
+        UploadedPaper.objects.filter(id=paper_id).update(claimed_attempt=attempt)
+
+    # processing=True was already saved by the upload view
 
-    citation_style = settings_dict.get("citation_style", "harvard") if settings_dict else "harvard"
-    export_type = settings_dict.get("export_type", "csv") if settings_dict else "csv"
+    # Known fields only, so messages queued with stale or extra settings still run
+    settings = TaskSettings(**{
+        k: v for k, v in (settings_dict or {}).items() if k in TaskSettings.__dataclass_fields__
+    })
 
+    # Validate file exists
+    if not paper.file or not paper.file.path:
+        fail_paper(paper, "File not found or corrupted")
+        return
+
+    file_parts = paper.file.name.rsplit(".", 1)
+    if len(file_parts) != 2:
+        fail_paper(paper, "Invalid file format")
+        return
+
+    _, ext = file_parts
+    doc_type = ext.lower()
+
+    if doc_type not in ['pdf', 'docx']:
+        fail_paper(paper, f"Unsupported file type: {doc_type}")
+        return
+
+    # Expected failures publish their own message; anything else is a bug and
+    # propagates after cleanup so Celery marks the task failed
     try:
-        # Validate file exists
-        if not paper.file or not paper.file.path:
-            raise RuntimeError("File not found or corrupted")
-            
-        file_parts = paper.file.name.rsplit(".", 1)
-        if len(file_parts) != 2:
-            raise RuntimeError("Invalid file format")
-            
-        _, ext = file_parts
-        doc_type = ext.lower()
-        
-        if doc_type not in ['pdf', 'docx']:
-            raise RuntimeError(f"Unsupported file type: {doc_type}")
-
-        results_dict = pipeline_run(
-            paper.file.path,
-            doc_type,
-            top_k=top_k,
-            export_type=export_type,
-            citation_style=citation_style
-        )
+        items = prepare_paragraphs(paper.file.path, doc_type)
+        candidates = search_paragraphs(items) if items else []
+    except requests.RequestException as e:
+        if self.request.retries < self.max_retries:
+            raise  # Celery retries the task; keep the paper for the next attempt
+        logger.exception("Preparing paper %s failed after retries", paper_id)
+        fail_paper(paper, str(e))
+        return
+    except (RuntimeError, OSError, ValueError) as e:
+        logger.exception("Preparing paper %s failed", paper_id)
+        fail_paper(paper, str(e))
+        return
+    except Exception:
+        # Anything else is a bug: still remove the paper, but let Celery record the failure
+        logger.exception("Preparing paper %s failed unexpectedly", paper_id)
+        fail_paper(paper, TASK_FAILED_MESSAGE)
+        raise
+
+    if not items:
+        fail_paper(paper, NO_CITATIONS_MESSAGE)
+        return
 
-        all_results = results_dict.get("results", [])
+    # Paragraphs go out in groups, so idle workers pick groups up in parallel
+    # while each group is still embedded in one batch
+    items = [
+        {"paragraph": item["paragraph"], "summary": item["summary"], "papers": papers}
+        for item, papers in zip(items, candidates)
+    ]
+    header = [
+        rank_paragraphs.s(items[i:i + PARAGRAPHS_PER_TASK], top_k, settings.citation_style)
+        for i in range(0, len(items), PARAGRAPHS_PER_TASK)
+    ]
+    callback = save_citations.s(paper_id).on_error(paper_failed.s(paper_id))
+    chord(header)(callback)
 
-        if not all_results:
-            raise RuntimeError("No citations were generated. The document may not contain suitable content for citation extraction.")
+@shared_task
+def rank_paragraphs(items, top_k=3, citation_style="harvard"):
+    """Celery task that ranks a group of paragraphs' candidate papers and formats the top_k citations"""
+    from .pipeline import rank_paragraphs as rank_group
+    return rank_group(items, top_k=top_k, citation_style=citation_style)
 
-        # Clear previous citations
-        paper.citations.all().delete()
+@shared_task
+def save_citations(group_results, paper_id):
+    """
+    Chord callback that replaces the paper's citations with the paragraph
+    results of every rank_paragraphs group, in paragraph order, and marks
+    the paper complete.
+    Unexpected errors here are handled by the paper_failed error callback.
+    """
+    # Replace citations and mark the paper complete in one transaction,
+    # holding the row lock so a concurrent run can't write a second set
+    with transaction.atomic():
+        paper = UploadedPaper.objects.select_for_update().only("id", "completed").filter(id=paper_id).first()
+        if paper is None or paper.completed:
+            return  # Paper was deleted or another run already finished it
 
-        # Save new results
-        formatter = CitationFormatter()
-        citations_created = 0
-        
+        # Save new results, skipping a paper repeated within a paragraph
+        rows = []
+        seen = set()
+
+        all_results = (para_result for group in group_results for para_result in group)
         for idx, para_result in enumerate(all_results, start=1):
             for paper_data in para_result.get("papers", []):
-                citation_text = formatter.format(paper_data, style=citation_style)
+                link = paper_data.get("link", "")
+                if (idx, link) in seen:
+                    continue
+                seen.add((idx, link))
+
+                # Paragraph results already carry the citation in this style
+                citation_text = paper_data["citation"]
+                title = paper_data.get("title", "")
+                # Results queued before authors_str existed only carry the list
+                authors = paper_data.get("authors_str") or ", ".join(paper_data.get("authors", []))
+                year = paper_data.get("year", "")
+                relevance = paper_data.get("relevance", 0)
 
-                Citation.objects.create(
+                rows.append(Citation(
                     paper=paper,
                     paragraph_number=idx,
                     paragraph_text=para_result.get("paragraph", ""),
-                    title=paper_data.get("title", ""),
-                    authors=", ".join(paper_data.get("authors", [])),
-                    year=paper_data.get("year", ""),
+                    title=title,
+                    authors=authors,
+                    year=year,
                     harvard_citation=citation_text,
-                    link=paper_data.get("link", ""),
-                    relevance=paper_data.get("relevance", 0)
-                )
-                citations_created += 1
-
-        if citations_created == 0:
-            raise RuntimeError("No citations could be saved to database")
-
-        paper.processing = False
-        paper.error_message = None
-        paper.save()
-
-    except Exception as e:
-        paper.processing = False
-        paper.error_message = str(e)
-        paper.save()
-        # Re-raise to be caught by async wrapper
-        raise
\ No newline at end of file
+                    link=link,
+                    relevance=relevance,
+                    export_cache=build_export_cache(
+                        len(rows) + 1, title, authors, year, citation_text, link, relevance
+                    )
+                ))
+
+        if not rows:
+            fail_paper(paper, NO_CITATIONS_MESSAGE)
+            return
+
+        # Clear previous citations with a single DELETE
+        Citation.objects.filter(paper_id=paper_id).delete()
+        Citation.objects.bulk_create(rows, batch_size=500)
+
+        # update() skips auto_now, and the viewer's paragraph cache is keyed on updated_at
+        UploadedPaper.objects.filter(id=paper_id).update(
+            processing=False, completed=True, error_message=None, updated_at=timezone.now()
+        )
+    publish_status(paper_id, "complete")
+
+@shared_task
+def paper_failed(request, exc, traceback, paper_id):
+    """Chord error callback: a rank_paragraphs task or save_citations failed, so the paper is marked failed and removed"""
+    logger.error("Processing paper %s failed: %r", paper_id, exc)
+    paper = UploadedPaper.objects.only("id", "file", "completed").filter(id=paper_id).first()
+    if paper is not None and not paper.completed:
+        fail_paper(paper, str(exc))
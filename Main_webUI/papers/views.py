@@ -1,42 +1,28 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
 from django.urls import reverse
 from django.utils.http import urlencode
+from django.core.cache import cache
 import csv
-import json
+import orjson
 from fpdf import FPDF
 from collections import defaultdict
-import threading  # for background processing
+import uuid
+from celery.result import AsyncResult
 from .forms import UploadPaperForm, SettingsForm
 from .models import UploadedPaper, UserSettings
-from .tasks import process_paper
-
-# --- Helper to run paper processing asynchronously ---
-def process_paper_async(paper_id, settings_dict):
-    """Process paper in background thread with proper error handling and file cleanup"""
-    def wrapper():
-        paper = None
-        try:
-            paper = UploadedPaper.objects.get(id=paper_id)
-            process_paper(paper_id, settings_dict=settings_dict)
-        except Exception as e:
-            # If processing fails, delete the paper and its file
-            if paper:
-                try:
-                    # Delete the actual file from storage
-                    if paper.file and paper.file.path:
-                        import os
-                        if os.path.exists(paper.file.path):
-                            os.remove(paper.file.path)
-                except Exception as file_delete_error:
-                    print(f"Error deleting file: {file_delete_error}")
-                
-                # Delete the paper record from database
-                paper.delete()
-                
-    thread = threading.Thread(target=wrapper)
-    thread.daemon = True
-    thread.start()
+from .tasks import process_paper, get_status, remove_upload, TASK_FAILED_MESSAGE
+
+DASHBOARD_LIMIT = 50  # most recent uploads listed on the dashboard
+
+def _task_failed(paper):
+    """True if the paper's Celery task failed without recording an error on the paper"""
+    return bool(paper.task_id) and AsyncResult(paper.task_id).state == "FAILURE"
+
+class Echo:
+    """File-like object whose write() returns the value, so csv.writer rows can be streamed"""
+    def write(self, value):
+        return value
 
 def dashboard_view(request):
     """
@@ -44,7 +30,7 @@ def dashboard_view(request):
     After upload, redirects user to the loading page.
     Any errors during upload are shown on dashboard.
     """
-    papers = UploadedPaper.objects.all().order_by("-uploaded_at")
+    papers = UploadedPaper.objects.only("id", "file", "uploaded_at").order_by("-uploaded_at")[:DASHBOARD_LIMIT]
     form = UploadPaperForm()
 
     settings_dict = request.session.get('settings', {"citation_style": "harvard", "export_type": "csv"})
@@ -62,19 +48,29 @@ def dashboard_view(request):
                 url = reverse("dashboard") + f"?{query_string}"
                 return redirect(url)
             
+            paper = None
             try:
                 paper = form.save(commit=False)
                 paper.processing = True
+                paper.task_id = str(uuid.uuid4())
                 paper.save()
 
-                # Start processing in background
-                process_paper_async(paper.id, settings_dict=settings_dict)
+                # Hand processing off to a Celery worker
+                process_paper.apply_async(
+                    (paper.id,), {"settings_dict": settings_dict}, task_id=paper.task_id
+                )
 
                 # Redirect to loading page immediately
                 return redirect("loading_page", paper_id=paper.id)
                 
             except Exception as e:
-                # If initial save fails, show error without saving paper
+                # If the save or the dispatch fails (e.g. the broker is down),
+                # remove whatever was stored and show the error
+                if paper is not None:
+                    file_path = paper.file.path if paper.file else None
+                    if paper.pk:
+                        paper.delete()
+                    remove_upload(file_path)
                 query_string = urlencode({"error": f"Upload failed: {str(e)}"})
                 url = reverse("dashboard") + f"?{query_string}"
                 return redirect(url)
@@ -98,9 +94,9 @@ def viewer_default_view(request):
     if last_clicked_id and UploadedPaper.objects.filter(id=last_clicked_id).exists():
         return redirect("viewer_detail", paper_id=last_clicked_id)
 
-    papers = UploadedPaper.objects.all().order_by("-uploaded_at")
-    if papers.exists():
-        return redirect("viewer_detail", paper_id=papers.first().id)
+    latest_id = UploadedPaper.objects.order_by("-uploaded_at").values_list("id", flat=True).first()
+    if latest_id:
+        return redirect("viewer_detail", paper_id=latest_id)
 
     return render(request, "papers/viewer_default.html")
 
@@ -117,37 +113,34 @@ def viewer_view(request, paper_id):
     # --- Export handling ---
     export_type = request.GET.get("export")
     if export_type:
+        # Citations are written in paragraph order, so id order matches it and
+        # walks the (paper, id) index without a sort
+        export_citations = paper.citations.order_by("id")
+        export_rows = export_citations.values_list("export_cache", flat=True)
+
         if export_type == "csv":
-            response = HttpResponse(content_type="text/csv")
+            writer = csv.writer(Echo())
+
+            def csv_rows():
+                yield writer.writerow(["Title", "Authors", "Year", "Citation", "Link", "Relevance"])
+                for row in export_rows.iterator(chunk_size=500):
+                    yield writer.writerow(row["csv_row"])
+
+            response = StreamingHttpResponse(csv_rows(), content_type="text/csv")
             response["Content-Disposition"] = 'attachment; filename="citations.csv"'
-            writer = csv.writer(response)
-            writer.writerow(["Title", "Authors", "Year", "Citation", "Link", "Relevance"])
-            for c in citations:
-                writer.writerow([c.title, c.authors, c.year, c.harvard_citation, c.link, int(c.relevance)])
             return response
 
         elif export_type == "json":
-            data = []
-            for c in citations:
-                data.append({
-                    "title": c.title,
-                    "authors": c.authors,
-                    "year": c.year,
-                    "citation": c.harvard_citation,
-                    "link": c.link,
-                    "relevance": int(c.relevance),
-                })
-            response = HttpResponse(json.dumps(data, indent=2), content_type="application/json")
+            data = [row["json_obj"] for row in export_rows]
+            response = HttpResponse(orjson.dumps(data, option=orjson.OPT_INDENT_2), content_type="application/json")
             response["Content-Disposition"] = 'attachment; filename="citations.json"'
             return response
 
         elif export_type == "bibtex":
-            response = HttpResponse(content_type="text/plain")
+            response = StreamingHttpResponse(
+                (row["bibtex"] for row in export_rows.iterator(chunk_size=500)), content_type="text/plain"
+            )
             response["Content-Disposition"] = 'attachment; filename="citations.bib"'
-            for i, c in enumerate(citations, 1):
-                response.write(
-                    f"@article{{cite{i},\n  title={{{c.title}}},\n  author={{{c.authors}}},\n  year={{{c.year}}},\n  url={{{c.link}}}\n}}\n\n"
-                )
             return response
 
         elif export_type == "pdf":
@@ -155,28 +148,36 @@ def viewer_view(request, paper_id):
             pdf.add_page()
             pdf.set_auto_page_break(auto=True, margin=15)
             pdf.set_font("Arial", size=12)
-            for c in citations:
-                pdf.multi_cell(0, 5, f"{c.harvard_citation}\n")
+            # One multi_cell for all citations: a single layout pass instead of one per row
+            text = "\n\n".join(export_citations.values_list("harvard_citation", flat=True))
+            pdf.multi_cell(0, 5, text)
             pdf_bytes = pdf.output(dest='S').encode('latin1')
             response = HttpResponse(pdf_bytes, content_type="application/pdf")
             response['Content-Disposition'] = 'attachment; filename="citations.pdf"'
             return response
 
-    # --- Group citations by paragraph ---
-    paragraphs_dict = defaultdict(list)
-    for c in citations:
-        paragraphs_dict[c.paragraph_number].append(c)
-
-    paragraphs = []
-    for idx, para_num in enumerate(sorted(paragraphs_dict.keys()), 1):
-        para_citations = paragraphs_dict[para_num]
-        para_text = para_citations[0].paragraph_text or ""
-        paragraphs.append({
-            "number": para_num,  # Paragraph 1, 2, 3...
-            "text": para_text,
-            "citations": para_citations,
-            "count": len(para_citations)
-        })
+    # --- Group citations by paragraph (cached until the paper is reprocessed) ---
+    paragraphs_key = f"paragraphs:{paper.id}:{paper.updated_at.timestamp()}"
+    paragraphs = cache.get(paragraphs_key)
+    if paragraphs is None:
+        paragraphs_dict = defaultdict(list)
+        # Only the columns the viewer template renders (skips citation text and export cache)
+        for c in citations.only(
+            "paper_id", "paragraph_number", "paragraph_text", "title", "authors", "year", "link", "relevance"
+        ):
+            paragraphs_dict[c.paragraph_number].append(c)
+
+        paragraphs = []
+        for idx, para_num in enumerate(sorted(paragraphs_dict.keys()), 1):
+            para_citations = paragraphs_dict[para_num]
+            para_text = para_citations[0].paragraph_text or ""
+            paragraphs.append({
+                "number": para_num,  # Paragraph 1, 2, 3...
+                "text": para_text,
+                "citations": para_citations,
+                "count": len(para_citations)
+            })
+        cache.set(paragraphs_key, paragraphs, 60 * 60)
 
     # --- User settings ---
     if request.user.is_authenticated:
@@ -199,13 +200,26 @@ def loading_page(request, paper_id):
     """
     Loading page that only redirects if processing is complete or errored
     """
-    paper = get_object_or_404(UploadedPaper, id=paper_id)
+    # A finished task publishes its result, so repeat visits skip the database
+    status = get_status(paper_id)
+    if status is not None:
+        if status["status"] == "error":
+            # Failed papers are removed, so report the error on the dashboard
+            return redirect(reverse("dashboard") + "?" + urlencode({"error": status["error"]}))
+        return redirect("viewer_detail", paper_id=paper_id)
+
+    paper = get_object_or_404(
+        UploadedPaper.objects.only("id", "file", "processing", "error_message", "completed", "task_id"), id=paper_id
+    )
+
+    # A task that died in the worker never clears the processing flag, so ask Celery
+    task_failed = paper.processing and _task_failed(paper)
 
     # Only redirect if processing is definitely complete or errored
-    if not paper.processing and (paper.citations.exists() or paper.error_message):
+    if task_failed or (not paper.processing and (paper.completed or paper.error_message)):
         params = {}
-        if paper.error_message:
-            params["error"] = paper.error_message
+        if paper.error_message or task_failed:
+            params["error"] = paper.error_message or TASK_FAILED_MESSAGE
         url = reverse("viewer_detail", args=[paper.id])
         if params:
             url += "?" + urlencode(params)
@@ -215,27 +229,33 @@ def loading_page(request, paper_id):
 
 def check_processing_status(request, paper_id):
     """AJAX endpoint to check if paper processing is complete"""
+    status = get_status(paper_id)
+    if status is not None:
+        if status["status"] == "complete":
+            return JsonResponse({**status, 'redirect_url': reverse('viewer_detail', args=[paper_id])})
+        return JsonResponse(status)
+
     try:
-        paper = UploadedPaper.objects.get(id=paper_id)
-        
+        paper = UploadedPaper.objects.only("id", "processing", "error_message", "completed", "task_id").get(id=paper_id)
+
         if paper.error_message:
             return JsonResponse({
                 'status': 'error',
                 'error': paper.error_message
             })
-        elif paper.citations.exists():
+        elif paper.completed:
             return JsonResponse({
                 'status': 'complete',
                 'redirect_url': reverse('viewer_detail', args=[paper.id])
             })
-        elif paper.processing:
+        elif paper.processing and not _task_failed(paper):
             return JsonResponse({
                 'status': 'processing'
             })
         else:
             return JsonResponse({
                 'status': 'error',
-                'error': 'Processing failed unexpectedly'
+                'error': TASK_FAILED_MESSAGE
             })
             
     except UploadedPaper.DoesNotExist:
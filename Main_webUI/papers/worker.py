@@ -0,0 +1,12 @@
+from celery.signals import worker_process_init
+
+@worker_process_init.connect
+def load_models(**kwargs):
+    """
+    Loads the heavy NLP models once per Celery worker process, so every
+    paper the worker handles reuses them instead of reloading per upload.
+    """
+    from .Cleaner import get_nlp
+    from .SemanticRanker import get_ranker
+    get_nlp()
+    get_ranker()
@@ -1,15 +1,73 @@
 from django.shortcuts import render
+from django.core.cache import cache
+from datetime import date
 import arxiv
+import functools
+import hashlib
+import itertools
 import math
+from lxml import etree
+from papers.QueryAPI import get_session, TIMEOUT
 
-def fetch_results(query, max_results=200):
-    client = arxiv.Client(page_size=50, delay_seconds=3)
-    search = arxiv.Search(
-        query=query,
-        max_results=max_results,
-        sort_by=arxiv.SortCriterion.SubmittedDate
-    )
-    return list(client.results(search))
+ARXIV_CACHE_TIMEOUT = 60 * 60 * 24  # arXiv listings update daily
+ARXIV_API_URL = "http://export.arxiv.org/api/query"
+OPENSEARCH_NS = {"os": "http://a9.com/-/spec/opensearch/1.1/"}
+MAX_RESULTS = 200  # deepest result reachable by paging
+
+def serialize_result(r):
+    """Plain dict of the fields the search page shows (pickles cheaply, unlike arxiv.Result)"""
+    return {
+        'title': r.title,
+        'authors': [a.name for a in r.authors],
+        'published': r.published.strftime("%Y-%m-%d"),
+        'doi': r.doi,
+        'summary': r.summary,
+        'pdf_url': r.pdf_url,
+    }
+
+def _query_hash(query):
+    return hashlib.sha1(query.encode()).hexdigest()
+
+@functools.lru_cache(maxsize=256)
+def _cached_results(query, offset, limit, day):
+    """
+    One page of results for a query on a given day, shared across workers
+    through the Django cache and memoized in-process. Including the day in
+    the key means cached searches roll over when arXiv publishes new listings.
+    """
+    key = f"arxiv:{_query_hash(query)}:{offset}:{limit}:{day}"
+    results = cache.get(key)
+    if results is None:
+        # page_size=limit: the page is fetched with a single API request
+        client = arxiv.Client(page_size=limit, delay_seconds=3)
+        search = arxiv.Search(
+            query=query,
+            max_results=offset + limit,
+            sort_by=arxiv.SortCriterion.SubmittedDate
+        )
+        page = itertools.islice(client.results(search, offset=offset), limit)
+        results = [serialize_result(r) for r in page]
+        cache.set(key, results, ARXIV_CACHE_TIMEOUT)
+    return results
+
+@functools.lru_cache(maxsize=256)
+def _cached_total(query, day):
+    """Total matches for a query, from a max_results=0 request that returns no entries"""
+    key = f"arxiv-total:{_query_hash(query)}:{day}"
+    total = cache.get(key)
+    if total is None:
+        # Shared keep-alive session, so the count reuses the search connection and retries
+        resp = get_session().get(ARXIV_API_URL, params={"search_query": query, "max_results": 0}, timeout=TIMEOUT)
+        resp.raise_for_status()
+        total = int(etree.fromstring(resp.content).findtext("os:totalResults", "0", namespaces=OPENSEARCH_NS))
+        cache.set(key, total, ARXIV_CACHE_TIMEOUT)
+    return total
+
+def fetch_results(query, offset=0, limit=15):
+    return _cached_results(query, offset, limit, date.today().isoformat())
+
+def fetch_total(query):
+    return min(_cached_total(query, date.today().isoformat()), MAX_RESULTS)
 
 def index(request):
     query = request.GET.get('query', '').strip()
@@ -27,8 +85,7 @@ def index(request):
     total = 0
 
     if query:
-        results = fetch_results(query)
-        total = len(results)
+        total = fetch_total(query)
         max_page = max(1, math.ceil(total / page_size))
 
         # Clamp page to max_page
@@ -36,16 +93,7 @@ def index(request):
             page = max_page
 
         start_index = (page - 1) * page_size
-        page_results = results[start_index:start_index + page_size]
-
-        papers = [{
-            'title': r.title,
-            'authors': [a.name for a in r.authors],
-            'published': r.published.strftime("%Y-%m-%d"),
-            'doi': r.doi,
-            'summary': r.summary,
-            'pdf_url': r.pdf_url,
-        } for r in page_results]
+        papers = fetch_results(query, offset=start_index, limit=page_size)
     else:
         start_index = 0
         max_page = 1  # no results yet
@@ -41,7 +41,15 @@ def fetch_results(query, max_results=200):
     client = arxiv.Client(page_size=50, delay_seconds=3)
     search = arxiv.Search(query=query, max_results=max_results,
                           sort_by=arxiv.SortCriterion.SubmittedDate)
-    return list(client.results(search))
+    # Cache plain dicts with the display strings already formatted,
+    # so reruns (e.g. paging) don't re-join authors or re-format dates
+    return [{
+        "title": r.title,
+        "authors": ", ".join(a.name for a in r.authors),
+        "published": r.published.strftime("%Y-%m-%d"),
+        "summary": r.summary[:500],
+        "pdf_url": r.pdf_url,
+    } for r in client.results(search)]
 
 # ---------- State ----------
 if "query" not in st.session_state: st.session_state.query = ""
@@ -92,17 +100,19 @@ else:
     current_papers = results[start:end]
 
     # Render papers as cards (everything inside the card)
-    # --- Display papers like feed ---
+    # --- Display papers like feed, in a single markdown call ---
+    cards = []
     for i, r in enumerate(current_papers, start=start + 1):
-        st.markdown(f"""
+        cards.append(f"""
         <div class="paper">
-            <h3>{i}. {r.title}</h3>
-            <div class="authors">{", ".join(a.name for a in r.authors)}</div>
-            <div class="date">Published: {r.published.strftime("%Y-%m-%d")}</div>
-            <div class="summary">{r.summary[:500]}...</div>
-            <a href="{r.pdf_url}" target="_blank">📄 Read PDF</a>
+            <h3>{i}. {r["title"]}</h3>
+            <div class="authors">{r["authors"]}</div>
+            <div class="date">Published: {r["published"]}</div>
+            <div class="summary">{r["summary"]}...</div>
+            <a href="{r["pdf_url"]}" target="_blank">📄 Read PDF</a>
         </div>
-        """, unsafe_allow_html=True)
+        """)
+    st.markdown("\n".join(cards), unsafe_allow_html=True)
 
     # Bottom-center pagination
     spacer_l, center, spacer_r = st.columns([2,3,2])
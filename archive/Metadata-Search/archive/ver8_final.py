@@ -46,7 +46,16 @@ def fetch_results(query, max_results=200):
     client = arxiv.Client(page_size=50, delay_seconds=3)
     search = arxiv.Search(query=query, max_results=max_results,
                           sort_by=arxiv.SortCriterion.SubmittedDate)
-    return list(client.results(search))
+    # Cache plain dicts with the display strings already formatted,
+    # so reruns (e.g. paging) don't re-join authors or re-format dates
+    return [{
+        "title": r.title,
+        "authors": ", ".join(a.name for a in r.authors),
+        "published": r.published.strftime("%Y-%m-%d"),
+        "doi": f"(DOI: {r.doi})" if r.doi else "",
+        "summary": r.summary[:500],
+        "pdf_url": r.pdf_url,
+    } for r in client.results(search)]
 
 # ---------- State ----------
 if "query" not in st.session_state: st.session_state.query = ""
@@ -140,19 +149,20 @@ else:
     end = start + page_size
     current_papers = results[start:end]
 
-    # Render each paper as a card
+    # Render all cards in a single markdown call (one frontend update instead of one per card)
+    cards = []
     for i, r in enumerate(current_papers, start=start + 1):
-        doi_text = f"(DOI: {r.doi})" if r.doi else ""
-        st.markdown(f"""
+        cards.append(f"""
             <div class="paper">
-                <h3>{i}. {r.title}</h3>
-                <div class="authors">{', '.join(a.name for a in r.authors)}</div>
-                <div class="date">Published: {r.published.strftime('%Y-%m-%d')}</div>
-                <div class="doi">{doi_text}</div>
-                <div class="summary">{r.summary[:500]}...</div>
-                <div class="pdf"><a href="{r.pdf_url}" target="_blank">📄 Read PDF</a></div>
+                <h3>{i}. {r['title']}</h3>
+                <div class="authors">{r['authors']}</div>
+                <div class="date">Published: {r['published']}</div>
+                <div class="doi">{r['doi']}</div>
+                <div class="summary">{r['summary']}...</div>
+                <div class="pdf"><a href="{r['pdf_url']}" target="_blank">📄 Read PDF</a></div>
             </div>
-        """, unsafe_allow_html=True)
+        """)
+    st.markdown("\n".join(cards), unsafe_allow_html=True)
 
     # Bottom-center pagination
     spacer_l, center, spacer_r = st.columns([2,3,2])